@@ -11,20 +11,60 @@ Features:
 """
 
 import sys
+import atexit
+import collections
+import threading
 import subprocess
+import signal
 import os
 import time
-from urllib.request import urlopen
+import socket
 import logging
 import shutil
+import re
+import random
+import functools
+import getpass
+import tempfile
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import Request, getproxies, proxy_bypass, urlopen
 
 # -------------------- Logging Setup --------------------
 import logging as py_logging
 py_logging.getLogger("WDM").setLevel(py_logging.ERROR)  # Suppress webdriver-manager INFO logs
 
 LOGFILE = "setup_selenium.log"
-logging.basicConfig(filename=LOGFILE, level=logging.INFO,
+LOG_BUFFER_SIZE = 64 * 1024
+
+class _BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that writes through a 64 KB buffer instead of flushing after every record.
+    ERROR records and above are flushed immediately; the rest is written when the
+    buffer fills, on flush(), or when logging shuts down at exit.
+    """
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE, encoding=self.encoding)
+
+    def emit(self, record):
+        # Like StreamHandler.emit(), minus the per-record flush (handle() already holds the lock)
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+            return
+        if record.levelno >= logging.ERROR:
+            self.flush()
+
+_log_handler = _BufferedFileHandler(LOGFILE)
+logging.basicConfig(handlers=[_log_handler], level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
 
 # -------------------- Console Output Helpers --------------------
@@ -42,35 +82,159 @@ def print_error(text):
     print_color(f"❌ {text}", "31")
     logging.error(text)
 
+def print_warning(text):
+    # Print warning message in yellow and log it
+    print_color(f"⚠️ {text}", "33")
+    logging.warning(text)
+
 def print_info(text):
     # Print info message in blue and log it
     print_color(f"ℹ️ {text}", "34")
     logging.info(text)
 
 # -------------------- Utility / Checks --------------------
+def env_int(name, default, minimum=None, maximum=None):
+    # Read an integer setting from the environment; bad or out-of-range values fall back to
+    # 'default' with a warning instead of crashing at import time
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        value = None
+    if value is None or (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        print_warning(f"Ignoring invalid {name}={raw!r}; using {default}")
+        return default
+    return value
+
 SCREENSHOT_DIR = Path("screenshots")
 SCREENSHOT_DIR.mkdir(exist_ok=True)  # Ensure screenshot directory exists
 
+_SS_PREFIX = str(SCREENSHOT_DIR) + os.sep
+_SS_RUN_ID = int(time.time())  # Taken once so filenames from earlier runs are not overwritten
+_ss_counter = itertools.count()  # Monotonic per-run sequence, avoids same-second collisions
+
 def save_screenshot(driver, name_prefix: str):
-    # Save a screenshot from the Selenium driver with a timestamped filename
-    ts = int(time.time())
-    path = SCREENSHOT_DIR / f"{name_prefix}_{ts}.png"
+    # Save a screenshot from the Selenium driver with a run-id + sequence filename
+    path = f"{_SS_PREFIX}{name_prefix}_{_SS_RUN_ID}_{next(_ss_counter)}.png"
     try:
-        driver.save_screenshot(str(path))
+        driver.save_screenshot(path)
         return path
     except Exception as e:
         logging.exception("Failed to save screenshot")
         return None
 
+# Public DNS resolvers; a TCP connect to any one of them is enough to prove connectivity
+INTERNET_PROBE_ADDRS = [("1.1.1.1", 53), ("8.8.8.8", 53), ("1.0.0.1", 53)]
+INTERNET_PROBE_URL = "https://www.google.com"  # HTTP fallback for networks that block outbound port 53
+_internet_ok = None  # Cached result of a successful check_internet() in this process
+
+_HTTP_POOL = None  # Process-wide urllib3 pool, created on first successful _http_pool() call
+_HTTP_POOL_LOCK = threading.Lock()
+
+def _http_pool():
+    """
+    Return a process-wide urllib3 pool so repeated HTTP probes reuse one TLS connection.
+    Honours HTTPS_PROXY/HTTP_PROXY (and NO_PROXY) like urlopen does by using a ProxyManager.
+    Returns None when urllib3 can't be imported yet (it arrives with selenium); that miss
+    is not remembered, so a later call can pick urllib3 up once pip has installed it.
+    """
+    global _HTTP_POOL
+    with _HTTP_POOL_LOCK:
+        if _HTTP_POOL is not None:
+            return _HTTP_POOL
+        try:
+            import urllib3
+        except Exception:
+            # Not installed, or half-written because pip is installing it concurrently
+            logging.info("urllib3 unavailable, using urlopen for the HTTP probe", exc_info=True)
+            return None
+        kwargs = dict(num_pools=1, maxsize=2, retries=False, timeout=urllib3.Timeout(connect=2, read=2))
+        proxies = getproxies()
+        host = urlparse(INTERNET_PROBE_URL).hostname
+        proxy_url = proxies.get("https") or proxies.get("http")
+        if proxy_url and not proxy_bypass(host):
+            _HTTP_POOL = urllib3.ProxyManager(proxy_url, **kwargs)
+        else:
+            _HTTP_POOL = urllib3.PoolManager(**kwargs)
+        return _HTTP_POOL
+
+def _probe_http():
+    # HEAD INTERNET_PROBE_URL (no body download), over the pooled connection when urllib3 is available
+    pool = _http_pool()
+    if pool is not None:
+        pool.request("HEAD", INTERNET_PROBE_URL)
+    else:
+        urlopen(Request(INTERNET_PROBE_URL, method="HEAD"), timeout=5).close()
+
+def _probe_tcp():
+    """
+    TCP-connect to every INTERNET_PROBE_ADDRS endpoint in parallel and return True on the
+    first success, so one slow or blackholed endpoint doesn't stall the check.
+    """
+    def connect(addr):
+        try:
+            with socket.create_connection(addr, timeout=2):
+                return True
+        except OSError as e:
+            logging.info(f"TCP connectivity probe to {addr[0]}:{addr[1]} failed: {e}")
+            return False
+
+    executor = ThreadPoolExecutor(max_workers=len(INTERNET_PROBE_ADDRS))
+    try:
+        futures = [executor.submit(connect, addr) for addr in INTERNET_PROBE_ADDRS]
+        for future in as_completed(futures, timeout=3):
+            if future.result():
+                return True
+    except FuturesTimeoutError:
+        pass
+    finally:
+        # Don't wait for the slower probes once one has answered
+        executor.shutdown(wait=False)
+    return False
+
 def check_internet():
-    # Check for internet connectivity by trying to reach Google
+    # Check for internet connectivity with parallel TCP connects (no DNS/TLS/HTTP round-trips),
+    # falling back to an HTTP HEAD request if every TCP probe is blocked
+    global _internet_ok
+    if _internet_ok:
+        return True
+    if _probe_tcp():
+        _internet_ok = True
+        return True
     try:
-        urlopen("https://www.google.com", timeout=5)
+        _probe_http()
+        _internet_ok = True
         return True
     except Exception as e:
         print_error(f"Internet connection error: {e}")
         return False
 
+MAX_BACKOFF_SECS = 30
+
+def backoff_delay(attempt):
+    # Exponential backoff with jitter: ~1s, ~2s, ~4s, ... capped at MAX_BACKOFF_SECS.
+    # The jitter keeps parallel CI jobs from retrying in lockstep.
+    return min(2 ** (attempt - 1) + random.random(), MAX_BACKOFF_SECS)
+
+def prefetch_dns(url):
+    """
+    Resolve url's hostname in a background thread so the OS resolver cache is warm
+    by the time the browser loads it. Errors are ignored; the browser will resolve again.
+    """
+    host = urlparse(url).hostname
+    if not host:
+        return
+
+    def resolve():
+        try:
+            socket.getaddrinfo(host, 443)
+        except OSError:
+            logging.info(f"DNS prefetch for {host} failed")
+
+    threading.Thread(target=resolve, daemon=True).start()
+
 def check_python_version():
     # Ensure Python version is at least 3.6
     if sys.version_info < (3, 6):
@@ -79,109 +243,693 @@ def check_python_version():
     print_success(f"Python version: {sys.version}")
     return True
 
+def _path_executables(wanted):
+    """
+    List every PATH directory once and return {name: [full paths in PATH order]} for the
+    names in 'wanted' that appear there. On Windows names are matched case-insensitively
+    with executable extensions (PATHEXT) stripped. Hits are not validated here; see
+    _is_executable() for that.
+    """
+    is_windows = sys.platform.startswith("win")
+    exts = {e.lower() for e in os.environ.get("PATHEXT", ".EXE").split(os.pathsep) if e}
+    wanted = set(wanted)
+    found = {}
+    for d in os.environ.get("PATH", "").split(os.pathsep):
+        d = d or os.curdir
+        try:
+            entries = os.listdir(d)
+        except OSError:
+            continue
+        if is_windows:
+            for n in entries:
+                key, ext = os.path.splitext(n.lower())
+                if key in wanted and ext in exts:
+                    found.setdefault(key, []).append(os.path.join(d, n))
+        else:
+            for n in wanted.intersection(entries):
+                found.setdefault(n, []).append(os.path.join(d, n))
+    return found
+
+def _is_executable(path):
+    # Same test as shutil.which: an existing regular file (symlinks followed) we may execute
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "sbabty_sel"
+DETECTED_BROWSER_CACHE = CACHE_DIR / "detected_browser"
+DETECTED_BROWSER_TTL = 24 * 60 * 60  # seconds
+
+def _read_detected_browser_cache():
+    # Return the browser name cached by a previous run if it is still fresh, else None
+    try:
+        if time.time() - DETECTED_BROWSER_CACHE.stat().st_mtime >= DETECTED_BROWSER_TTL:
+            return None
+        name = DETECTED_BROWSER_CACHE.read_text().strip()
+    except (OSError, ValueError):  # ValueError covers a corrupt, non-UTF-8 cache file
+        return None
+    return name if name in ("chrome", "firefox") else None
+
+def _write_detected_browser_cache(name):
+    # Persist the detected browser name; failures (e.g. read-only home) are only logged
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        DETECTED_BROWSER_CACHE.write_text(name + "\n")
+    except OSError:
+        logging.exception("Failed to write detected browser cache")
+
 def detect_browser():
     """
     Try to detect an installed browser executable.
     Prefer Chrome/Chromium over Firefox when both present.
+    A successful detection is cached on disk for 24 hours to skip the PATH walk.
     """
+    cached = _read_detected_browser_cache()
+    if cached:
+        logging.info(f"Using cached browser detection -> {cached}")
+        return cached
+
     candidates = [
         ("chrome", ["google-chrome", "chrome", "chromium", "chromium-browser"]),
         ("firefox", ["firefox"])
     ]
+    exe_paths = _path_executables(b for _, bins in candidates for b in bins)
     for name, bins in candidates:
         for b in bins:
-            if shutil.which(b):
+            # Only the few candidate hits are stat()ed, e.g. to reject dangling symlinks
+            if any(_is_executable(path) for path in exe_paths.get(b, ())):
                 logging.info(f"Detected browser binary '{b}' -> choosing {name}")
+                _write_detected_browser_cache(name)
                 return name
     logging.info("No browser binary detected from PATH")
     return None
 
+# -------------------- Driver Resolution --------------------
+WDM_DRIVERS_DIR = Path.home() / ".wdm" / "drivers"
+
+@functools.lru_cache(maxsize=None)
+def get_browser_major_version(browser):
+    """
+    Return the installed browser's major version as a string, or None if unknown.
+    Uses '<binary> --version' on POSIX and the registry on Windows.
+    """
+    if browser == "chrome" and sys.platform.startswith("win"):
+        try:
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Google\Chrome\BLBeacon") as key:
+                version, _ = winreg.QueryValueEx(key, "version")
+            return version.split(".")[0]
+        except Exception:
+            return None
+
+    bins = {
+        "chrome": ["google-chrome", "chrome", "chromium", "chromium-browser"],
+        "firefox": ["firefox"],
+    }.get(browser, [])
+    for b in bins:
+        exe = shutil.which(b)
+        if not exe:
+            continue
+        try:
+            out = subprocess.run([exe, "--version"], stdout=subprocess.PIPE,
+                                 stderr=subprocess.DEVNULL, timeout=5,
+                                 universal_newlines=True).stdout
+        except Exception:
+            continue
+        match = re.search(r"(\d+)\.\d+", out)
+        if match:
+            return match.group(1)
+    return None
+
+def resolve_driver_path(browser):
+    """
+    Look for an already-downloaded driver binary in the webdriver-manager cache.
+    Returns the path as a string, or None on a cache miss so callers can fall
+    back to the (network-bound) webdriver-manager install().
+    """
+    if browser == "chrome":
+        names = ("chromedriver", "chromedriver.exe")
+        # ~/.wdm/drivers/chromedriver/<platform>/<version>/.../chromedriver
+        major = get_browser_major_version("chrome")
+        if major is None:
+            return None
+        pattern = f"chromedriver/*/{major}.*/**/chromedriver*"
+    elif browser == "firefox":
+        # geckodriver versions are not tied to the Firefox version; any cached one will do
+        names = ("geckodriver", "geckodriver.exe")
+        pattern = "geckodriver/*/*/**/geckodriver*"
+    else:
+        return None
+
+    try:
+        matches = [p for p in WDM_DRIVERS_DIR.glob(pattern) if p.name in names and _is_executable(str(p))]
+    except OSError:
+        return None
+    if not matches:
+        return None
+    # Prefer the most recently downloaded driver
+    path = max(matches, key=lambda p: p.stat().st_mtime)
+    logging.info(f"Using cached {browser} driver: {path}")
+    return str(path)
+
+_WDM_THREAD_LOCK = threading.Lock()
+
+def _wdm_lock():
+    # Lock guarding webdriver-manager installs: a file lock when 'filelock' is available,
+    # otherwise a process-local lock
+    try:
+        from filelock import FileLock
+    except ImportError:
+        return _WDM_THREAD_LOCK
+    WDM_DRIVERS_DIR.parent.mkdir(parents=True, exist_ok=True)
+    return FileLock(str(WDM_DRIVERS_DIR.parent / ".lock"))
+
+@functools.lru_cache(maxsize=None)
+def _driver_path(browser):
+    """
+    Resolve the driver binary for 'browser' once per process.
+    Tries the local webdriver-manager cache first, then falls back to install().
+    Failures are not cached, so a retry will try the resolution again.
+    """
+    path = resolve_driver_path(browser)
+    if path:
+        return path
+    # Serialize the first-time download/unpack so concurrent launches don't race on ~/.wdm
+    with _wdm_lock():
+        if browser == "chrome":
+            from webdriver_manager.chrome import ChromeDriverManager
+            return ChromeDriverManager().install()
+        if browser == "firefox":
+            from webdriver_manager.firefox import GeckoDriverManager
+            return GeckoDriverManager().install()
+    raise ValueError(f"Unsupported browser: {browser}")
+
 # -------------------- Installation --------------------
-def install_packages(retries=3):
+REQUIRED_PACKAGES = ["selenium", "webdriver-manager"]
+
+def packages_installed():
+    # Return True if every required package is already installed (no pip subprocess needed)
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:  # Python < 3.8
+        return False
+    try:
+        for pkg in REQUIRED_PACKAGES:
+            logging.info(f"Found {pkg} {version(pkg)}")
+    except PackageNotFoundError:
+        return False
+    return True
+
+class _InstallCancelled(Exception):
+    # Raised when install_packages() is asked to stop while pip is running
+    pass
+
+def _pip_install(binary_only, stop_event):
+    # Run pip install for REQUIRED_PACKAGES, appending its output to the log file.
+    # pip is terminated (raising _InstallCancelled) as soon as stop_event is set.
+    cmd = [sys.executable, "-m", "pip", "install",
+           "--prefer-binary", "--disable-pip-version-check", "--no-input", "--quiet"]
+    if binary_only:
+        # Refuse sdists so pip never falls back to a slow build from source
+        cmd.append("--only-binary=:all:")
+    cmd += REQUIRED_PACKAGES
+    _log_handler.flush()  # Keep our records ahead of pip's output in the log
+    with open(LOGFILE, "a") as lf:
+        proc = subprocess.Popen(cmd, stdout=lf, stderr=lf)
+        while True:
+            try:
+                returncode = proc.wait(timeout=0.2)
+                break
+            except subprocess.TimeoutExpired:
+                if stop_event.is_set():
+                    proc.terminate()
+                    proc.wait()
+                    raise _InstallCancelled()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+def install_packages(retries=3, stop_event=None):
     """
     Install selenium and webdriver-manager via pip.
+    Skips pip entirely when both packages are already installed.
+    The first attempt requires wheels; later attempts also allow source builds.
     Pip output is redirected to the log file to keep console tidy.
     Retries installation up to 'retries' times if it fails.
+    Setting 'stop_event' aborts the install (including a running pip) and returns False.
     """
+    if packages_installed():
+        print_success("selenium and webdriver-manager already installed.")
+        return True
+
+    stop_event = stop_event or threading.Event()
+    binary_only = True
     for attempt in range(1, retries + 1):
         try:
             print_info("Installing selenium and webdriver-manager (pip)...")
-            with open(LOGFILE, "a") as lf:
-                subprocess.run([
-                    sys.executable, "-m", "pip", "install",
-                    "selenium", "webdriver-manager", "--quiet"
-                ], stdout=lf, stderr=lf, check=True)
+            _pip_install(binary_only=binary_only, stop_event=stop_event)
             print_success("Packages installed successfully.")
             return True
+        except _InstallCancelled:
+            logging.info("Package installation cancelled")
+            return False
         except subprocess.CalledProcessError as e:
             print_error(f"Attempt {attempt}: Failed to install packages (see {LOGFILE})")
             logging.exception("pip install failed")
+            if binary_only:
+                # Maybe no wheel exists for this platform: allow source builds from now on
+                binary_only = False
+                print_info("Allowing source builds for the remaining attempts.")
             if attempt < retries:
-                print_info("Retrying in 5 seconds...")
-                time.sleep(5)
+                delay = backoff_delay(attempt)
+                print_info(f"Retrying in {delay:.1f} seconds...")
+                if stop_event.wait(delay):
+                    logging.info("Package installation cancelled")
+                    return False
             else:
                 return False
 
+# -------------------- Driver Management --------------------
+@functools.lru_cache(maxsize=None)
+def _load_selenium():
+    """
+    Import the Selenium modules used by this script once and return them in a namespace.
+    Imports are deferred until needed because selenium may be installed by this script.
+    """
+    from types import SimpleNamespace
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from selenium.webdriver.chrome.options import Options as ChromeOptions
+    from selenium.webdriver.firefox.service import Service as FirefoxService
+    from selenium.webdriver.firefox.options import Options as FirefoxOptions
+
+    return SimpleNamespace(webdriver=webdriver, By=By, WebDriverWait=WebDriverWait, EC=EC,
+                           ChromeService=ChromeService, ChromeOptions=ChromeOptions,
+                           FirefoxService=FirefoxService, FirefoxOptions=FirefoxOptions)
+
+SHM_DIR = "/dev/shm"
+SHM_MIN_BYTES = 1024 ** 3  # /dev/shm needs this much free space to host Chrome's shared memory and profiles
+
+def _shm_is_roomy():
+    # True when /dev/shm exists and has plenty of free space (Docker's default is only 64 MB in total)
+    try:
+        st = os.statvfs(SHM_DIR)
+    except (AttributeError, OSError):  # No statvfs on Windows, or no /dev/shm
+        return False
+    return st.f_frsize * st.f_bavail >= SHM_MIN_BYTES
+
+_SHM_ROOMY = _shm_is_roomy()
+
+# Chrome switches that don't depend on the run; built once and reused for every launch
+_CHROME_OPTIONS_TEMPLATE = (
+    "--no-sandbox",
+    "--disable-gpu",
+    "--window-size=1920,1080",
+    # The smoke test only needs the DOM: skip images and background services
+    "--blink-settings=imagesEnabled=false",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+) + (() if _SHM_ROOMY else (
+    # Small /dev/shm (e.g. Docker's 64 MB default) crashes pages; use temp files for shared memory
+    "--disable-dev-shm-usage",
+))
+
+@functools.lru_cache(maxsize=None)
+def _chrome_headless_flag():
+    # '--headless=new' needs Chrome 109+; older (or undetectable) versions get the legacy flag
+    major = get_browser_major_version("chrome")
+    if major is not None and int(major) < 109:
+        return "--headless"
+    return "--headless=new"
+
+@functools.lru_cache(maxsize=None)
+def _chrome_arguments(headless):
+    # Command-line switches for Chrome, shared by WebDriver launches and the persistent debug browser
+    if headless:
+        return (_chrome_headless_flag(),) + _CHROME_OPTIONS_TEMPLATE
+    return _CHROME_OPTIONS_TEMPLATE
+
+# -------------------- Persistent Chrome (remote debugging) --------------------
+CHROME_DEBUG_PORT = env_int("SEL_DEBUG_PORT", 9222, minimum=1, maximum=65535)
+# Per-user names, so users sharing a sticky /tmp can't block or hijack each other's Chrome
+_USER_ID = str(os.getuid()) if hasattr(os, "getuid") else getpass.getuser()
+CHROME_DEBUG_PROFILE = Path(tempfile.gettempdir()) / f"sel-profile-{_USER_ID}"
+CHROME_PID_FILE = Path(tempfile.gettempdir()) / f"sel-chrome-{_USER_ID}.pid"
+
+def _chrome_binary():
+    # Return the full path of the first Chrome/Chromium executable on PATH, or None
+    for b in ("google-chrome", "chrome", "chromium", "chromium-browser"):
+        exe = shutil.which(b)
+        if exe:
+            return exe
+    return None
+
+def _debug_port_live():
+    # Return True if something is listening on the Chrome remote-debugging port
+    try:
+        with socket.create_connection(("127.0.0.1", CHROME_DEBUG_PORT), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+def _is_our_chrome(pid):
+    """
+    Return True if 'pid' is still the persistent Chrome this script launched, False if it
+    is gone (or the pid was reused by an unrelated process), or None if that can't be
+    checked on this platform (Windows).
+    """
+    if sys.platform.startswith("win"):
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return False  # Alive but owned by another user, so not ours
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmdline = f.read().decode(errors="replace")
+    except OSError:
+        return True  # No /proc (e.g. macOS); liveness is the best we can do
+    return f"--remote-debugging-port={CHROME_DEBUG_PORT}" in cmdline
+
+def _remove_pid_file():
+    # Delete CHROME_PID_FILE if present
+    try:
+        CHROME_PID_FILE.unlink()
+    except OSError:
+        pass
+
+def _stop_process(pid=None, proc=None):
+    # Terminate a persistent Chrome (by Popen object or pid), killing it if it doesn't exit promptly
+    try:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait(timeout=5)
+        else:
+            os.kill(pid, signal.SIGTERM)
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and _debug_port_live():
+                time.sleep(0.1)
+    except (OSError, subprocess.TimeoutExpired):
+        logging.exception("Failed to stop persistent Chrome")
+
+def _persistent_chrome_address(headless):
+    """
+    Return the debugger address of a long-lived Chrome that WebDriver can attach to.
+    Reuses the Chrome recorded in CHROME_PID_FILE when it is still running, owns the
+    debugging port and its headless mode matches; a recorded Chrome in the wrong mode
+    is stopped and replaced. Returns None if no reusable Chrome is available, so
+    callers can fall back to a regular launch.
+    """
+    address = f"127.0.0.1:{CHROME_DEBUG_PORT}"
+    mode = "headless" if headless else "headed"
+    try:
+        pid, recorded_mode = CHROME_PID_FILE.read_text().split()
+        pid = int(pid)
+    except (OSError, ValueError):
+        pid, recorded_mode = None, None
+
+    ours = _is_our_chrome(pid) if pid is not None else False
+    if ours is False and pid is not None:
+        # Stale pid file: that Chrome has exited
+        _remove_pid_file()
+        pid, recorded_mode = None, None
+
+    if _debug_port_live():
+        if pid is not None and recorded_mode == mode:
+            logging.info(f"Attaching to running Chrome (pid {pid}) at {address}")
+            return address
+        if ours:
+            logging.info(f"Stopping persistent Chrome (pid {pid}) running in {recorded_mode} mode")
+            _stop_process(pid=pid)
+            _remove_pid_file()
+        if _debug_port_live():
+            logging.info(f"Port {CHROME_DEBUG_PORT} is in use by another process/mode; not reusing it")
+            return None
+
+    exe = _chrome_binary()
+    if not exe:
+        return None
+    cmd = [exe, f"--remote-debugging-port={CHROME_DEBUG_PORT}", f"--user-data-dir={CHROME_DEBUG_PROFILE}",
+           "--no-first-run", "--no-default-browser-check", *_chrome_arguments(headless)]
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                start_new_session=True)
+    except OSError:
+        logging.exception("Failed to launch persistent Chrome")
+        return None
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        if _debug_port_live():
+            try:
+                CHROME_PID_FILE.write_text(f"{proc.pid} {mode}\n")
+            except OSError:
+                # Without a pid file later runs can't reuse this Chrome, so don't leave it running
+                logging.exception(f"Failed to write {CHROME_PID_FILE}; stopping persistent Chrome")
+                _stop_process(proc=proc)
+                return None
+            logging.info(f"Launched persistent Chrome (pid {proc.pid}) at {address}")
+            return address
+        if proc.poll() is not None:
+            break
+        time.sleep(0.1)
+    logging.error("Persistent Chrome did not open its debugging port")
+    # Don't leave a detached Chrome behind that could grab the port later without a pid file
+    if proc.poll() is None:
+        _stop_process(proc=proc)
+    return None
+
+# Per-launch Chrome profiles live on tmpfs when it is roomy enough, so profile writes never hit disk
+PROFILE_ROOT = SHM_DIR if _SHM_ROOMY else None
+_PROFILE_DIRS = {}  # id(driver) -> temporary Chrome profile directory
+
+def _remove_profile_dir(driver):
+    # Delete the temporary profile of a driver that has been quit
+    profile_dir = _PROFILE_DIRS.pop(id(driver), None)
+    if profile_dir:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+def _remove_all_profile_dirs():
+    # Delete any temporary profiles left behind at exit
+    while _PROFILE_DIRS:
+        _, profile_dir = _PROFILE_DIRS.popitem()
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+def _create_driver(browser, headless, reuse_browser=False):
+    # Launch a new WebDriver session for the chosen browser
+    sel = _load_selenium()
+
+    if browser == "chrome":
+        options = sel.ChromeOptions()
+        # Return from get() after DOMContentLoaded instead of the full 'load' event
+        options.page_load_strategy = "eager"
+        address = _persistent_chrome_address(headless) if reuse_browser else None
+        if address:
+            # Attach to the already-running Chrome instead of spawning a new one
+            options.debugger_address = address
+            service = sel.ChromeService(_driver_path("chrome"))
+            return sel.webdriver.Chrome(service=service, options=options)
+
+        for arg in _chrome_arguments(headless):
+            options.add_argument(arg)
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+        try:
+            profile_dir = tempfile.mkdtemp(prefix="sel-", dir=PROFILE_ROOT)
+        except OSError:
+            # e.g. /dev/shm is not writable; use the default temp dir instead
+            profile_dir = tempfile.mkdtemp(prefix="sel-")
+        options.add_argument(f"--user-data-dir={profile_dir}")
+
+        try:
+            service = sel.ChromeService(_driver_path("chrome"))
+            driver = sel.webdriver.Chrome(service=service, options=options)
+        except Exception:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        _PROFILE_DIRS[id(driver)] = profile_dir
+        return driver
+
+    if browser == "firefox":
+        options = sel.FirefoxOptions()
+        options.headless = bool(headless)
+        options.add_argument("--width=1920")
+        options.add_argument("--height=1080")
+        options.page_load_strategy = "eager"
+
+        service = sel.FirefoxService(_driver_path("firefox"))
+        return sel.webdriver.Firefox(service=service, options=options)
+
+    raise ValueError(f"Unsupported browser: {browser}")
+
+BROWSER_POOL_SIZE = env_int("BROWSER_POOL_SIZE", 2, minimum=1)
+BROWSER_RECYCLE_AFTER = 100  # Relaunch a browser after this many checkouts
+
+class _BrowserPool:
+    """
+    Pool of live WebDriver sessions for one (browser, headless, reuse_browser) combination.
+    Browsers are launched lazily up to 'size' and handed out in FIFO order;
+    callers block when every browser is checked out. Each session is
+    recycled after BROWSER_RECYCLE_AFTER checkouts.
+    """
+
+    def __init__(self, browser, headless, size, reuse_browser=False):
+        self.browser = browser
+        self.headless = headless
+        self.size = size
+        self.reuse_browser = reuse_browser
+        self._idle = collections.deque()
+        # Guards _idle/_launched; notified whenever a driver is returned or a slot is freed
+        self._cond = threading.Condition()
+        self._launched = 0
+        self._uses = {}  # id(driver) -> checkout count
+
+    def checkout(self):
+        # Return an idle driver, launching a new one if the pool has spare capacity
+        with self._cond:
+            while not self._idle and self._launched >= self.size:
+                self._cond.wait()
+            if self._idle:
+                driver = self._idle.popleft()
+            else:
+                driver = None
+                self._launched += 1
+        if driver is None:
+            try:
+                driver = _create_driver(self.browser, self.headless, self.reuse_browser)
+            except Exception:
+                self._free_slot()
+                raise
+        self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+        return driver
+
+    def checkin(self, driver):
+        # Return a driver to the pool, or recycle it once it has been used enough
+        if self._uses.get(id(driver), 0) >= BROWSER_RECYCLE_AFTER:
+            self.discard(driver)
+        else:
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+
+    def _free_slot(self):
+        # Release a launch slot and wake a caller waiting in checkout() so it can launch a browser
+        with self._cond:
+            self._launched -= 1
+            self._cond.notify()
+
+    def discard(self, driver):
+        # Quit a driver and free its slot in the pool
+        self._uses.pop(id(driver), None)
+        self._free_slot()
+        try:
+            driver.quit()
+        except Exception:
+            logging.exception("Error while quitting discarded driver")
+        _remove_profile_dir(driver)
+
+    def close(self):
+        # Quit every idle driver
+        while True:
+            with self._cond:
+                if not self._idle:
+                    return
+                driver = self._idle.popleft()
+            self.discard(driver)
+
+_BROWSER_POOLS = {}  # (browser, headless, reuse_browser) -> _BrowserPool
+_BROWSER_POOLS_LOCK = threading.Lock()
+
+def _get_pool(browser, headless, reuse_browser=False):
+    # Return the browser pool for (browser, headless, reuse_browser), creating it on first use
+    key = (browser, bool(headless), bool(reuse_browser))
+    with _BROWSER_POOLS_LOCK:
+        pool = _BROWSER_POOLS.get(key)
+        if pool is None:
+            pool = _BROWSER_POOLS[key] = _BrowserPool(browser, bool(headless), BROWSER_POOL_SIZE,
+                                                      bool(reuse_browser))
+    return pool
+
+def _checkout_driver(pool):
+    """
+    Check a browser out of the pool and open a fresh tab for the caller.
+    Browser cold-start is the slowest part of a run, so sessions are kept alive
+    and quit at interpreter exit instead of after every attempt.
+    """
+    driver = pool.checkout()
+    try:
+        driver.switch_to.new_window("tab")
+    except Exception:
+        pool.discard(driver)
+        raise
+    return driver
+
+def _release_driver(pool, driver, reset=False):
+    # Close the caller's tab and return the browser to the pool; discard it if unusable
+    try:
+        if reset:
+            driver.delete_all_cookies()
+        driver.close()
+        driver.switch_to.window(driver.window_handles[0])
+    except Exception:
+        logging.exception("Pooled driver is unusable, discarding it")
+        pool.discard(driver)
+        return
+    pool.checkin(driver)
+
+def quit_drivers():
+    # Quit every pooled WebDriver session
+    with _BROWSER_POOLS_LOCK:
+        pools = list(_BROWSER_POOLS.values())
+        _BROWSER_POOLS.clear()
+    for pool in pools:
+        pool.close()
+
+# atexit runs handlers in reverse order: drivers are quit before their profiles are removed
+atexit.register(_remove_all_profile_dirs)
+atexit.register(quit_drivers)
+
 # -------------------- Selenium Smoke Test --------------------
-def test_selenium(browser="chrome", headless=True, test_url="https://www.google.com", retries=2, wait_secs=10):
+WAIT_POLL_SECS = 0.05
+
+def test_selenium(browser="chrome", headless=True, test_url="https://www.google.com", retries=2, wait_secs=10,
+                  reuse_browser=False):
     """
     Launch chosen browser, visit test_url and wait for element name='q' (Google search box).
     Saves a screenshot on success and on failure attempts.
-    Retries the test up to 'retries' times if it fails.
+    Retries the test up to 'retries' times if it fails, checking a browser out of the shared pool.
+    With reuse_browser (Chrome only), attaches to a persistent Chrome over its remote-debugging port.
     """
+    browser = browser.lower()
+    if browser not in ("chrome", "firefox"):
+        print_error(f"Unsupported browser: {browser}. Choose 'chrome' or 'firefox'.")
+        return False
+    pool = _get_pool(browser, headless, reuse_browser and browser == "chrome")
+
     for attempt in range(1, retries + 1):
         driver = None
         try:
-            # Import Selenium modules only when needed
-            from selenium import webdriver
-            from selenium.webdriver.common.by import By
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
-
-            # Setup browser-specific options and driver
-            if browser.lower() == "chrome":
-                from selenium.webdriver.chrome.service import Service as ChromeService
-                from selenium.webdriver.chrome.options import Options as ChromeOptions
-                from webdriver_manager.chrome import ChromeDriverManager
-
-                options = ChromeOptions()
-                if headless:
-                    # Use new headless mode if available
-                    try:
-                        options.add_argument("--headless=new")
-                    except Exception:
-                        options.add_argument("--headless")
-                options.add_argument("--no-sandbox")
-                options.add_argument("--disable-dev-shm-usage")
-                options.add_argument("--disable-gpu")
-                options.add_argument("--window-size=1920,1080")
-
-                service = ChromeService(ChromeDriverManager().install())
-                driver = webdriver.Chrome(service=service, options=options)
-
-            elif browser.lower() == "firefox":
-                from selenium.webdriver.firefox.service import Service as FirefoxService
-                from selenium.webdriver.firefox.options import Options as FirefoxOptions
-                from webdriver_manager.firefox import GeckoDriverManager
-
-                options = FirefoxOptions()
-                options.headless = bool(headless)
-                options.add_argument("--width=1920")
-                options.add_argument("--height=1080")
-
-                service = FirefoxService(GeckoDriverManager().install())
-                driver = webdriver.Firefox(service=service, options=options)
-
-            else:
-                print_error(f"Unsupported browser: {browser}. Choose 'chrome' or 'firefox'.")
-                return False
+            # Import Selenium modules only when needed (cached after the first attempt)
+            sel = _load_selenium()
 
             print_info(f"Launching {browser} (headless={headless}) and loading {test_url} ...")
+            driver = _checkout_driver(pool)
             driver.set_page_load_timeout(30)
             driver.get(test_url)
 
             # Wait for the search box element to appear
-            WebDriverWait(driver, wait_secs).until(EC.presence_of_element_located((By.NAME, "q")))
+            # Poll every 50 ms (default is 500 ms); find_element is a cheap local call to the driver
+            sel.WebDriverWait(driver, wait_secs, poll_frequency=WAIT_POLL_SECS).until(
+                sel.EC.presence_of_element_located((sel.By.NAME, "q")))
 
             # Save screenshot on success
             success_path = save_screenshot(driver, f"selenium_success_{browser}")
@@ -190,7 +938,7 @@ def test_selenium(browser="chrome", headless=True, test_url="https://www.google.
             else:
                 print_success("Selenium smoke test passed (screenshot failed).")
 
-            driver.quit()
+            _release_driver(pool, driver)
             return True
 
         except Exception as e:
@@ -202,13 +950,14 @@ def test_selenium(browser="chrome", headless=True, test_url="https://www.google.
                     fail_path = save_screenshot(driver, f"selenium_fail_{browser}_attempt{attempt}")
                     if fail_path:
                         print_info(f"Saved failure screenshot: {fail_path}")
-                    driver.quit()
+                    _release_driver(pool, driver, reset=True)
             except Exception:
                 logging.exception("Error while handling failed driver")
 
             if attempt < retries:
-                print_info("Retrying Selenium test in 3 seconds...")
-                time.sleep(3)
+                delay = backoff_delay(attempt)
+                print_info(f"Retrying Selenium test in {delay:.1f} seconds...")
+                time.sleep(delay)
             else:
                 return False
 
@@ -240,33 +989,50 @@ def main():
     parser.add_argument("--no-install", action="store_true", help="Skip pip install step (useful in venv).")
     parser.add_argument("--test-url", default=os.environ.get("TEST_URL", "https://www.google.com"),
                         help="URL to use for the smoke test (default: https://www.google.com or TEST_URL env).")
+    parser.add_argument("--reuse-browser", action="store_true",
+                        default=os.environ.get("SEL_REUSE_BROWSER", "0") not in ("0", "false", "False", "FALSE"),
+                        help="Chrome only: keep a Chrome running with --remote-debugging-port (SEL_DEBUG_PORT, "
+                             "default 9222) and attach to it on later runs (default: env SEL_REUSE_BROWSER).")
     parser.add_argument("--install-retries", default=3, type=int, help="Retries for pip install.")
     parser.add_argument("--test-retries", default=2, type=int, help="Retries for the selenium test.")
     args = parser.parse_args()
 
+    # Warm the DNS cache for the test URL while the checks and pip install run
+    prefetch_dns(args.test_url)
+
     # Check Python version
     if not check_python_version():
         sys.exit(1)
 
-    # Check internet connectivity
-    if not check_internet():
-        print_error("Internet is required to install drivers/packages (or to download drivers).")
-        sys.exit(1)
+    # Check internet connectivity and install required packages (unless --no-install) concurrently,
+    # so the connectivity probe overlaps with pip's own network I/O
+    stop_install = threading.Event()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        internet_future = executor.submit(check_internet)
+        install_future = None
+        if not args.no_install:
+            install_future = executor.submit(install_packages, retries=args.install_retries,
+                                             stop_event=stop_install)
+        else:
+            print_info("Skipping package installation (--no-install).")
 
-    # Install required packages unless --no-install is specified
-    if not args.no_install:
-        if not install_packages(retries=args.install_retries):
+        if not internet_future.result():
+            # Stop pip now so leaving the executor block doesn't wait for its retries
+            stop_install.set()
+            print_error("Internet is required to install drivers/packages (or to download drivers).")
+            sys.exit(1)
+
+        if install_future is not None and not install_future.result():
             print_error("Failed to install required packages. See setup_selenium.log for details.")
             sys.exit(1)
-    else:
-        print_info("Skipping package installation (--no-install).")
 
     chosen_browser = args.browser
     print_info(f"Using browser: {chosen_browser} (headless={args.headless})")
 
     # Run the Selenium smoke test
     success = test_selenium(browser=chosen_browser, headless=args.headless,
-                           test_url=args.test_url, retries=args.test_retries)
+                           test_url=args.test_url, retries=args.test_retries,
+                           reuse_browser=args.reuse_browser)
 
     if success:
         print_success("All done — Selenium smoke test succeeded.")